@@ -6,13 +6,32 @@ Feature information is included in the output from GenBank and EMBL files.
 Usage: 
     python seq_to_json.py input
 
+Use --compact to write a string table and feature sequence references instead of
+repeated strings and feature sequences. expand_compact_seq_records converts compact
+output back into the standard format.
+
+Use --gc-content and --gc-skew to add CGView plots for DNA sequences. Window sizes and
+step can be set with --window (comma-separated) and --step.
+
+Use --incremental with --output to keep a cache of record hashes next to the output.
+On the next run only GenBank or EMBL records whose text has changed are converted again
+and the other records are copied from the previous output.
+
+Use --orfs to add ORFs from all six reading frames as features for FASTA and raw DNA
+sequences. ORFs start at ATG unless --alt-starts or --start-codons is given. See also
+--genetic-code, --min-orf-length and --stop-codons.
+
 Author: 
     Paul Stothard
 """
 import argparse
+import hashlib
 import re
 import json
 import sys
+import textwrap
+from array import array
+from bisect import bisect_left
 from pathlib import Path
 
 
@@ -111,25 +130,38 @@ def is_parsable_feature_range(feature_range_text):
     return True
 
 
+# split text into sequence record texts on //
+def get_seq_record_texts(sequence_file_text):
+    return list(
+        filter(
+            is_sequence_record,
+            re.split(r"^\/\/", sequence_file_text, flags=re.MULTILINE),
+        )
+    )
+
+
+# parse the text of a single GenBank or EMBL record
+def get_seq_record(record_text):
+    record = {}
+    record["input_type"] = ""
+    m = re.search(r"^\s*LOCUS|^\s*FEATURES", record_text, flags=re.MULTILINE)
+    if m:
+        record["input_type"] = "genbank"
+    elif re.search(r"^\s*ID|^\s*FH   Key", record_text, flags=re.MULTILINE):
+        record["input_type"] = "embl"
+    record["name"] = get_seq_name(record_text)
+    record["length"] = get_seq_length(record_text)
+    record["sequence"] = get_seq(record_text)
+    record["features"] = get_features(record_text)
+    return record
+
+
 # parse text into array of sequence records by splitting on //
 def get_seq_records(sequence_file_text):
-    records = []
-    for record_text in filter(
-        is_sequence_record, re.split(r"^\/\/", sequence_file_text, flags=re.MULTILINE)
-    ):
-        record = {}
-        record["input_type"] = ""
-        m = re.search(r"^\s*LOCUS|^\s*FEATURES", record_text, flags=re.MULTILINE)
-        if m:
-            record["input_type"] = "genbank"
-        elif re.search(r"^\s*ID|^\s*FH   Key", record_text, flags=re.MULTILINE):
-            record["input_type"] = "embl"
-        record["name"] = get_seq_name(record_text)
-        record["length"] = get_seq_length(record_text)
-        record["sequence"] = get_seq(record_text)
-        record["features"] = get_features(record_text)
-        records.append(record)
-    return records
+    return [
+        get_seq_record(record_text)
+        for record_text in get_seq_record_texts(sequence_file_text)
+    ]
 
 
 # get a sequence name from a GenBank or EMBL record
@@ -241,10 +273,14 @@ def get_feature_qualifiers(feature_text):
                 flags=re.DOTALL | re.MULTILINE,
             )
             if m:
-                qualifier["feature_name"] = m.group(1)
-                qualifier["feature_value"] = format_feature_qualifier_value(m.group(2))
+                qualifier["feature_name"] = sys.intern(m.group(1))
+                qualifier["feature_value"] = sys.intern(
+                    format_feature_qualifier_value(m.group(2))
+                )
             else:
-                qualifier["feature_name"] = remove_whitespace(qualifier_text)
+                qualifier["feature_name"] = sys.intern(
+                    remove_whitespace(qualifier_text)
+                )
                 qualifier["feature_value"] = ""
             qualifiers.append(qualifier)
     return qualifiers
@@ -273,7 +309,7 @@ def get_feature_strand(feature_text):
 def get_feature_name(feature_text):
     m = re.search(r"^\s{5}(\S+)", feature_text)
     if m:
-        return m.group(1)
+        return sys.intern(m.group(1))
     else:
         return ""
 
@@ -304,6 +340,135 @@ def add_feature_sequences(seq_records):
                 feature["feature_sequence"] = "".join(dna)
 
 
+# add feature sequence references to an array of dictionaries containing feature information
+# instead of copying the sequence, each location is stored as [record, start, end, strand]
+# where record is the index of the sequence record in the output
+# use resolve_feature_sequence to get the feature sequence back from the references
+def add_feature_sequence_refs(seq_records):
+    for record_index, seq_record in enumerate(seq_records):
+        for feature in seq_record["features"]:
+            refs = []
+            for locations in feature["feature_locations"]:
+                try:
+                    start = int(locations["feature_range_start"])
+                    end = int(locations["feature_range_end"])
+                    refs.append([record_index, start, end, feature["feature_strand"]])
+                except:
+                    eprint(
+                        "Unable to add feature sequence for feature: "
+                        + feature["feature_name"]
+                        + " in sequence: '"
+                        + seq_record["name"]
+                        + "'."
+                    )
+                    break
+            feature["feature_sequence_refs"] = refs
+
+
+# get a feature sequence from an array of [record, start, end, strand] references
+# the locations are joined in order and the result is reverse complemented if the strand is -1
+# this matches the feature_sequence values written by add_feature_sequences
+def resolve_feature_sequence(seq_records, feature_sequence_refs):
+    dna = []
+    strand = 1
+    for record_index, start, end, strand in feature_sequence_refs:
+        dna.append(seq_records[record_index]["sequence"][start - 1 : end])
+    if strand == -1:
+        return reverse(complement("".join(dna)))
+    return "".join(dna)
+
+
+# convert an array of sequence records into compact output
+# feature names, qualifier names and qualifier values are stored once in a string table
+# and features refer to them by index
+# qualifiers are written as [name, value] pairs and locations as [start, end] pairs
+# e.g.
+# {
+#     "strings": ["gene", "locus_tag", "ECPA2_RS30085"],
+#     "records": [{"name": ..., "features": [{"feature_name": 0, "feature_qualifiers": [[1, 2]], ...}]}]
+# }
+def get_compact_seq_records(seq_records):
+    strings = []
+    string_indexes = {}
+
+    def string_index(string):
+        index = string_indexes.get(string)
+        if index is None:
+            index = len(strings)
+            string_indexes[string] = index
+            strings.append(string)
+        return index
+
+    records = []
+    for seq_record in seq_records:
+        record = {key: value for key, value in seq_record.items() if key != "features"}
+        record["features"] = []
+        for feature in seq_record["features"]:
+            compact_feature = {
+                "feature_name": string_index(feature["feature_name"]),
+                "feature_strand": feature["feature_strand"],
+                "location_text": feature["location_text"],
+                "feature_locations": [
+                    [locations["feature_range_start"], locations["feature_range_end"]]
+                    for locations in feature["feature_locations"]
+                ],
+                "feature_qualifiers": [
+                    [
+                        string_index(qualifier["feature_name"]),
+                        string_index(qualifier["feature_value"]),
+                    ]
+                    for qualifier in feature["feature_qualifiers"]
+                ],
+            }
+            if "feature_sequence_refs" in feature:
+                compact_feature["feature_sequence_refs"] = feature[
+                    "feature_sequence_refs"
+                ]
+            record["features"].append(compact_feature)
+        records.append(record)
+    return {"strings": strings, "records": records}
+
+
+# convert a record from compact output back into a sequence record using the string table
+# feature sequence references are not resolved
+def expand_compact_seq_record(record, strings):
+    seq_record = {key: value for key, value in record.items() if key != "features"}
+    seq_record["features"] = [
+        {
+            "feature_name": strings[compact_feature["feature_name"]],
+            "feature_strand": compact_feature["feature_strand"],
+            "location_text": compact_feature["location_text"],
+            "feature_locations": [
+                {"feature_range_start": start, "feature_range_end": end}
+                for start, end in compact_feature["feature_locations"]
+            ],
+            "feature_qualifiers": [
+                {"feature_name": strings[name], "feature_value": strings[value]}
+                for name, value in compact_feature["feature_qualifiers"]
+            ],
+        }
+        for compact_feature in record["features"]
+    ]
+    return seq_record
+
+
+# convert compact output from get_compact_seq_records back into an array of sequence records
+# feature sequence references are resolved into feature_sequence values
+def expand_compact_seq_records(compact_seq_records):
+    strings = compact_seq_records["strings"]
+    seq_records = [
+        expand_compact_seq_record(record, strings)
+        for record in compact_seq_records["records"]
+    ]
+    for record, seq_record in zip(compact_seq_records["records"], seq_records):
+        for compact_feature, feature in zip(record["features"], seq_record["features"]):
+            if "feature_sequence_refs" in compact_feature:
+                feature["feature_sequence"] = resolve_feature_sequence(
+                    seq_records, compact_feature["feature_sequence_refs"]
+                )
+    return seq_records
+
+
 # add overall feature start and end positions to an array of dictionaries containing feature information
 # the start is the smallest start position of all the feature locations
 # the end is the largest end position of all the feature locations
@@ -485,6 +650,411 @@ def get_count_common_aa_in_string(sequence):
     return sum(map(lambda x: sequence.upper().count(x), char))
 
 
+# genetic codes used to find start and stop codons for ORFs
+# amino acids and starts are listed for codons sorted by T, C, A, G, as in CodonTable.js
+# Base1 = TTTTTTTTTTTTTTTTCCCCCCCCCCCCCCCCAAAAAAAAAAAAAAAAGGGGGGGGGGGGGGGG
+# Base2 = TTTTCCCCAAAAGGGGTTTTCCCCAAAAGGGGTTTTCCCCAAAAGGGGTTTTCCCCAAAAGGGG
+# Base3 = TCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAGTCAG
+GENETIC_CODES = {
+    1: (
+        "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "---M---------------M---------------M----------------------------",
+    ),
+    2: (
+        "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSS**VVVVAAAADDEEGGGG",
+        "--------------------------------MMMM---------------M------------",
+    ),
+    3: (
+        "FFLLSSSSYY**CCWWTTTTPPPPHHQQRRRRIIMMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "----------------------------------MM----------------------------",
+    ),
+    4: (
+        "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "--MM---------------M------------MMMM---------------M------------",
+    ),
+    5: (
+        "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSSSVVVVAAAADDEEGGGG",
+        "---M----------------------------MMMM---------------M------------",
+    ),
+    6: (
+        "FFLLSSSSYYQQCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "-----------------------------------M----------------------------",
+    ),
+    9: (
+        "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",
+        "-----------------------------------M---------------M------------",
+    ),
+    10: (
+        "FFLLSSSSYY**CCCWLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "-----------------------------------M----------------------------",
+    ),
+    11: (
+        "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "---M---------------M------------MMMM---------------M------------",
+    ),
+    12: (
+        "FFLLSSSSYY**CC*WLLLSPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "-------------------M---------------M----------------------------",
+    ),
+    13: (
+        "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNKKSSGGVVVVAAAADDEEGGGG",
+        "---M------------------------------MM---------------M------------",
+    ),
+    14: (
+        "FFLLSSSSYYY*CCWWLLLLPPPPHHQQRRRRIIIMTTTTNNNKSSSSVVVVAAAADDEEGGGG",
+        "-----------------------------------M----------------------------",
+    ),
+    15: (
+        "FFLLSSSSYY*QCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "-----------------------------------M----------------------------",
+    ),
+    16: (
+        "FFLLSSSSYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "-----------------------------------M----------------------------",
+    ),
+    21: (
+        "FFLLSSSSYY**CCWWLLLLPPPPHHQQRRRRIIMMTTTTNNNKSSSSVVVVAAAADDEEGGGG",
+        "-----------------------------------M---------------M------------",
+    ),
+    22: (
+        "FFLLSS*SYY*LCC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "-----------------------------------M----------------------------",
+    ),
+    23: (
+        "FF*LSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG",
+        "--------------------------------M--M---------------M------------",
+    ),
+}
+
+
+# get start and stop codons for a genetic code
+# only ATG is used as a start codon unless alt_starts is True,
+# in which case all start codons of the genetic code are used
+def get_start_and_stop_codons(genetic_code, alt_starts=False):
+    aa, starts = GENETIC_CODES[genetic_code]
+    codons = [b1 + b2 + b3 for b1 in "TCAG" for b2 in "TCAG" for b3 in "TCAG"]
+    start_codons = ["ATG"]
+    if alt_starts:
+        start_codons = [codon for codon, start in zip(codons, starts) if start == "M"]
+    stop_codons = [codon for codon, amino_acid in zip(codons, aa) if amino_acid == "*"]
+    return start_codons, stop_codons
+
+
+# get 0-based positions of all codons in a sequence, grouped by reading frame
+# the codons are found with a single regular expression scan instead of one slice at a time
+def get_codon_positions_by_frame(sequence, codons):
+    positions_by_frame = ([], [], [])
+    pattern = "(?=(?:" + "|".join(codons) + "))"
+    for m in re.finditer(pattern, sequence):
+        position = m.start()
+        positions_by_frame[position % 3].append(position)
+    return positions_by_frame
+
+
+# get ORFs on one strand of a sequence as 0-based [start, end) ranges, including the stop codon
+# in each reading frame an ORF runs from the first start codon after a stop codon to the next stop codon
+# min_length is the minimum ORF length in codons, as in CGView.js
+def get_orf_ranges(sequence, start_codons, stop_codons, min_length):
+    ranges = []
+    starts_by_frame = get_codon_positions_by_frame(sequence, start_codons)
+    stops_by_frame = get_codon_positions_by_frame(sequence, stop_codons)
+    for starts, stops in zip(starts_by_frame, stops_by_frame):
+        previous_stop_end = 0
+        for stop in stops:
+            i = bisect_left(starts, previous_stop_end)
+            if i < len(starts) and starts[i] < stop:
+                if stop + 3 - starts[i] >= min_length * 3:
+                    ranges.append((starts[i], stop + 3))
+            previous_stop_end = stop + 3
+    return ranges
+
+
+# get ORFs from all six reading frames of a sequence
+# ORFs are returned in the same format as features from get_features
+def get_orf_features(sequence, genetic_code, min_length, start_codons, stop_codons):
+    features = []
+    length = len(sequence)
+    forward = sequence.upper()
+    reverse_complement = reverse(complement(forward))
+    for strand, strand_sequence in ((1, forward), (-1, reverse_complement)):
+        for range_start, range_end in get_orf_ranges(
+            strand_sequence, start_codons, stop_codons, min_length
+        ):
+            if strand == 1:
+                start = str(range_start + 1)
+                end = str(range_end)
+                location_text = start + ".." + end
+            else:
+                start = str(length - range_end + 1)
+                end = str(length - range_start)
+                location_text = "complement(" + start + ".." + end + ")"
+            features.append(
+                {
+                    "feature_name": sys.intern("ORF"),
+                    "feature_strand": strand,
+                    "location_text": location_text,
+                    "feature_locations": [
+                        {"feature_range_start": start, "feature_range_end": end}
+                    ],
+                    "feature_qualifiers": [
+                        {
+                            "feature_name": sys.intern("transl_table"),
+                            "feature_value": sys.intern(str(genetic_code)),
+                        }
+                    ],
+                }
+            )
+    features.sort(
+        key=lambda feature: int(feature["feature_locations"][0]["feature_range_start"])
+    )
+    return features
+
+
+# add ORFs to an array of sequence records from FASTA or raw input
+# only DNA records are searched
+def add_orf_features(seq_records, genetic_code, min_length, start_codons, stop_codons):
+    for seq_record in seq_records:
+        if (
+            seq_record["input_type"] in ("fasta", "raw")
+            and seq_record["sequence"]
+            and seq_record["type"] == "dna"
+        ):
+            seq_record["features"] = get_orf_features(
+                seq_record["sequence"],
+                genetic_code,
+                min_length,
+                start_codons,
+                stop_codons,
+            )
+
+
+# get default window size and step for GC plots based on sequence length
+# these match the defaults used by CGView.js when it generates plots from the sequence
+def get_window_step(length):
+    if length < 1e3:
+        return 10, 1
+    elif length < 1e4:
+        return 50, 1
+    elif length < 1e5:
+        return 500, 1
+    elif length < 1e6:
+        return 1000, 10
+    elif length < 1e7:
+        return 10000, 100
+    elif length < 1e8:
+        return 50000, 1000
+    return 100000, 10000
+
+
+# block size for cumulative G and C counts
+# counts are kept for every GC_BLOCK_SIZE bases, so memory does not depend on window or step
+GC_BLOCK_SIZE = 1024
+
+
+# count G and C in sequence[start:end] without copying the sequence
+def get_gc_counts(sequence, start, end):
+    g = sequence.count("G", start, end) + sequence.count("g", start, end)
+    c = sequence.count("C", start, end) + sequence.count("c", start, end)
+    return g, c
+
+
+# get cumulative G and C counts at every block_size positions of a sequence
+# each block is counted with str.count, so the sequence is scanned once with no per-base loop
+# g_counts[i] is the number of G in sequence[0 : i * block_size]
+# the last entry is the count for the whole sequence
+def get_cumulative_gc_counts(sequence, block_size):
+    g_counts = array("q", [0])
+    c_counts = array("q", [0])
+    g = 0
+    c = 0
+    for start in range(0, len(sequence), block_size):
+        block_g, block_c = get_gc_counts(sequence, start, start + block_size)
+        g += block_g
+        c += block_c
+        g_counts.append(g)
+        c_counts.append(c)
+    return g_counts, c_counts
+
+
+# get G and C counts for a window from cumulative counts
+# the window starts at a 0-based offset and wraps around the end of the sequence
+# positions that do not fall on a block boundary are completed by counting the partial block
+def get_window_gc_counts(sequence, g_counts, c_counts, block_size, offset, window):
+    length = len(sequence)
+
+    def counts_before(position):
+        if position >= length:
+            return g_counts[-1], c_counts[-1]
+        block = position // block_size
+        g = g_counts[block]
+        c = c_counts[block]
+        if position % block_size:
+            partial_g, partial_c = get_gc_counts(sequence, block * block_size, position)
+            g += partial_g
+            c += partial_c
+        return g, c
+
+    start_g, start_c = counts_before(offset)
+    end = offset + window
+    if end <= length:
+        end_g, end_c = counts_before(end)
+        return end_g - start_g, end_c - start_c
+    end_g, end_c = counts_before(end - length)
+    return g_counts[-1] - start_g + end_g, c_counts[-1] - start_c + end_c
+
+
+# get GC content and GC skew plots for a sequence in the format used by CGView plots
+# e.g.
+# {"name": "gc-content-10000", "source": "gc-content", "positions": [...], "scores": [...], "baseline": 0.5, ...}
+# each window is centered on a position and positions mark where the plot changes, as in CGView.js
+# cumulative counts are made once and shared by all window sizes
+def get_gc_plots(sequence, windows, step, types):
+    length = len(sequence)
+    plots = []
+    if not length:
+        return plots
+    windows = [min(window, length) for window in windows]
+    block_size = GC_BLOCK_SIZE
+    g_counts, c_counts = get_cumulative_gc_counts(sequence, block_size)
+    average = (g_counts[-1] + c_counts[-1]) / length
+    for window in windows:
+        positions = []
+        content_scores = []
+        skew_scores = []
+        for position in range(0, length, step):
+            g, c = get_window_gc_counts(
+                sequence,
+                g_counts,
+                c_counts,
+                block_size,
+                (position - window // 2) % length,
+                window,
+            )
+            positions.append(1 if position == 0 else position + 1 - step // 2)
+            content_scores.append(round((g + c) / window, 4))
+            skew_scores.append(round((g - c) / (g + c), 4) if g + c else 0)
+        for plot_type, scores, baseline in (
+            ("gc-content", content_scores, round(average, 4)),
+            ("gc-skew", skew_scores, 0),
+        ):
+            if plot_type in types:
+                plots.append(
+                    {
+                        "name": plot_type + "-" + str(window),
+                        "source": plot_type,
+                        "window": window,
+                        "step": step,
+                        "positions": positions,
+                        "scores": scores,
+                        "baseline": baseline,
+                        "axisMin": min(scores),
+                        "axisMax": max(scores),
+                    }
+                )
+    return plots
+
+
+# add GC content and GC skew plots to an array of sequence records
+# only DNA records are given plots
+def add_gc_plots(seq_records, windows, step, types):
+    for seq_record in seq_records:
+        if seq_record["sequence"] and seq_record["type"] == "dna":
+            default_window, default_step = get_window_step(len(seq_record["sequence"]))
+            seq_record["plots"] = get_gc_plots(
+                seq_record["sequence"],
+                windows or [default_window],
+                step or default_step,
+                types,
+            )
+
+
+# version of the incremental conversion cache
+# increase this when changes to the script alter how records are parsed or written,
+# so that records cached by an older version are converted again
+INCREMENTAL_CACHE_VERSION = 2
+
+
+# get a hash of the text of a sequence record
+# used by incremental conversion to find records that have changed since the last run
+def get_seq_record_hash(record_text):
+    return hashlib.blake2b(record_text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# get the JSON text of a sequence record as it is written in the output
+# compact records are written without whitespace, other records with an indent of 4
+def get_seq_record_json(seq_record, compact):
+    if compact:
+        return json.dumps(seq_record, separators=(",", ":"))
+    return textwrap.indent(json.dumps(seq_record, indent=4), "    ")
+
+
+# join the JSON text of sequence records into the output text
+# the output is the same as json.dumps of the whole array, or of the compact output if
+# strings is given
+# returns the output text, the [start, end] span of each record in the output
+# and the span of the string table
+def get_output_json(record_jsons, strings=None):
+    if strings is None:
+        if not record_jsons:
+            return "[]", [], None
+        prefix = "[\n"
+        separator = ",\n"
+        suffix = "\n]"
+        strings_span = None
+    else:
+        strings_json = json.dumps(strings, separators=(",", ":"))
+        prefix = '{"strings":' + strings_json + ',"records":['
+        separator = ","
+        suffix = "]}"
+        strings_span = [len('{"strings":'), len('{"strings":') + len(strings_json)]
+    spans = []
+    position = len(prefix)
+    for record_json in record_jsons:
+        spans.append([position, position + len(record_json)])
+        position += len(record_json) + len(separator)
+    return prefix + separator.join(record_jsons) + suffix, spans, strings_span
+
+
+# read the incremental conversion cache written next to a previous output file
+# the cache holds the hash of each record and the span of the converted record in the output
+# returns the cache and the previous output text
+# the cache is ignored if it is missing, unreadable, was written with different options,
+# or if the output has changed since the cache was written
+def read_incremental_cache(cache_path, output_path, options):
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+        output_text = Path(output_path).read_text()
+    except (OSError, ValueError):
+        return None, ""
+    if (
+        not isinstance(cache, dict)
+        or cache.get("options") != options
+        or cache.get("output_hash") != get_seq_record_hash(output_text)
+    ):
+        return None, ""
+    return cache, output_text
+
+
+# write the incremental conversion cache
+# records are stored in input order as {"hash": record hash, "span": [start, end]}
+# the span is None for records that were removed from the output
+def write_incremental_cache(
+    cache_path, options, output_text, record_hashes, record_spans, strings_span
+):
+    cache = {
+        "options": options,
+        "output_hash": get_seq_record_hash(output_text),
+        "strings_span": strings_span,
+        "records": [
+            {"hash": record_hash, "span": span}
+            for record_hash, span in zip(record_hashes, record_spans)
+        ],
+    }
+    with open(cache_path, "w") as f:
+        f.write(json.dumps(cache, separators=(",", ":")))
+
+
 def exit_if_false(boolean, *args):
     if not boolean:
         eprint_exit(*args)
@@ -510,26 +1080,198 @@ if __name__ == "__main__":
         help="include the sequence of features in the output",
         default=False,
     )
+    parser.add_argument(
+        "-c",
+        "--compact",
+        action="store_true",
+        help="write compact output with a string table and feature sequence references",
+        default=False,
+    )
+    parser.add_argument(
+        "--gc-content",
+        action="store_true",
+        help="include GC content plots for DNA sequences in the output",
+        default=False,
+    )
+    parser.add_argument(
+        "--gc-skew",
+        action="store_true",
+        help="include GC skew plots for DNA sequences in the output",
+        default=False,
+    )
+    parser.add_argument(
+        "--window",
+        type=str,
+        help="comma-separated GC plot window sizes, otherwise based on sequence length",
+    )
+    parser.add_argument(
+        "--step",
+        type=int,
+        help="step size for GC plots, otherwise based on sequence length",
+    )
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="only convert GenBank or EMBL records that changed since the last run",
+        default=False,
+    )
+    parser.add_argument(
+        "--orfs",
+        action="store_true",
+        help="add ORFs from all six frames as features for FASTA and raw DNA sequences",
+        default=False,
+    )
+    parser.add_argument(
+        "--genetic-code",
+        type=int,
+        help="genetic code for ORF stop codons, and start codons with --alt-starts",
+        default=11,
+    )
+    parser.add_argument(
+        "--alt-starts",
+        action="store_true",
+        help="use all start codons of the genetic code for ORFs instead of only ATG",
+        default=False,
+    )
+    parser.add_argument(
+        "--min-orf-length",
+        type=int,
+        help="minimum ORF length in codons",
+        default=100,
+    )
+    parser.add_argument(
+        "--start-codons",
+        type=str,
+        help="comma-separated ORF start codons, otherwise ATG",
+    )
+    parser.add_argument(
+        "--stop-codons",
+        type=str,
+        help="comma-separated ORF stop codons, otherwise taken from the genetic code",
+    )
     args = parser.parse_args()
 
+    exit_if_false(
+        args.output or not args.incremental,
+        "An output file is required for incremental conversion.",
+    )
+
+    start_codons = []
+    stop_codons = []
+    if args.orfs:
+        exit_if_false(
+            args.genetic_code in GENETIC_CODES,
+            "Unknown genetic code ",
+            args.genetic_code,
+            ".",
+        )
+        start_codons, stop_codons = get_start_and_stop_codons(
+            args.genetic_code, args.alt_starts
+        )
+        if args.start_codons:
+            start_codons = args.start_codons.upper().split(",")
+        if args.stop_codons:
+            stop_codons = args.stop_codons.upper().split(",")
+        exit_if_false(
+            all(
+                re.fullmatch(r"[ACGT]{3}", codon)
+                for codon in start_codons + stop_codons
+            ),
+            "Start and stop codons must be three of A, C, G, or T.",
+        )
+        exit_if_false(
+            args.min_orf_length > 0,
+            "Minimum ORF length must be greater than 0.",
+        )
+
+    windows = []
+    if args.window:
+        try:
+            windows = [int(window) for window in args.window.split(",")]
+        except ValueError:
+            eprint_exit("Window sizes '" + args.window + "' are not integers.")
+    exit_if_false(
+        all(window > 0 for window in windows),
+        "Window sizes must be greater than 0.",
+    )
+    exit_if_false(
+        args.step is None or args.step > 0,
+        "Step size must be greater than 0.",
+    )
+
     if not is_text_file(args.input):
         eprint_exit("Input file '" + args.input + "' is not a text file.")
 
     text_string = Path(args.input).read_text()
 
-    seq_records = get_seq_records(text_string)
+    # in incremental mode records whose text is unchanged are reused from the previous output
+    # only new and changed records are parsed and checked
+    # each entry is (record hash, record, record JSON, whether the record was parsed in this run)
+    # reused records are kept as JSON text, or decoded in compact mode
+    # removed records have neither a record nor record JSON
+    cache_path = str(args.output) + ".cache"
+    cache_options = {
+        "cache_version": INCREMENTAL_CACHE_VERSION,
+        "sequence": args.sequence,
+        "compact": args.compact,
+        "gc_content": args.gc_content,
+        "gc_skew": args.gc_skew,
+        "window": windows,
+        "step": args.step,
+    }
+    cache = None
+    seq_record_entries = []
+    if args.incremental:
+        cache, previous_output = read_incremental_cache(
+            cache_path, args.output, cache_options
+        )
+        cached_spans = {}
+        previous_strings = []
+        if cache:
+            for entry in cache["records"]:
+                cached_spans.setdefault(entry["hash"], []).append(entry["span"])
+            if cache["strings_span"]:
+                start, end = cache["strings_span"]
+                previous_strings = json.loads(previous_output[start:end])
+        seq_records = []
+        for record_text in get_seq_record_texts(text_string):
+            record_hash = get_seq_record_hash(record_text)
+            if cached_spans.get(record_hash):
+                span = cached_spans[record_hash].pop(0)
+                seq_record = None
+                record_json = None
+                if span and args.compact:
+                    seq_record = expand_compact_seq_record(
+                        json.loads(previous_output[span[0] : span[1]]),
+                        previous_strings,
+                    )
+                elif span:
+                    record_json = previous_output[span[0] : span[1]]
+                seq_record_entries.append((record_hash, seq_record, record_json, False))
+            else:
+                seq_record = get_seq_record(record_text)
+                seq_records.append(seq_record)
+                seq_record_entries.append((record_hash, seq_record, None, True))
+    else:
+        seq_records = get_seq_records(text_string)
 
     # if unable to parse as GenBank or EMBL, try parsing as FASTA then raw
-    if (len(seq_records) == 0) or (
-        seq_records[0]["name"] == ""
-        and seq_records[0]["length"] == ""
-        and seq_records[0]["sequence"] == ""
+    # FASTA and raw input is not cached
+    if all(entry[3] for entry in seq_record_entries) and (
+        (len(seq_records) == 0)
+        or (
+            seq_records[0]["name"] == ""
+            and seq_records[0]["length"] == ""
+            and seq_records[0]["sequence"] == ""
+        )
     ):
         m = re.search(r"^\s*>", text_string)
         if m:
             seq_records = get_seq_records_from_fasta(text_string)
         else:
             seq_records = get_seq_record_from_raw(text_string)
+        seq_record_entries = []
 
     # try to determine whether the sequence in each record is DNA or protein
     # and whether there are unexpected characters in sequence
@@ -553,7 +1295,16 @@ if __name__ == "__main__":
             else:
                 seq_record["unexpected_characters_in_sequence"] = False
 
-    if args.sequence:
+    if args.orfs:
+        add_orf_features(
+            seq_records,
+            args.genetic_code,
+            args.min_orf_length,
+            start_codons,
+            stop_codons,
+        )
+
+    if args.sequence and not args.compact:
         add_feature_sequences(seq_records)
 
     add_overall_feature_start_and_end(seq_records)
@@ -632,7 +1383,7 @@ if __name__ == "__main__":
                     seq_record["name"],
                     "'.",
                 )
-            if feature["feature_sequence"] and seq_record["length"]:
+            if feature.get("feature_sequence") and seq_record["length"]:
                 exit_if_false(
                     len(feature["feature_sequence"]) <= int(seq_record["length"]),
                     "Feature sequence ",
@@ -645,7 +1396,7 @@ if __name__ == "__main__":
                     seq_record["name"],
                     "'.",
                 )
-            if feature["feature_sequence"]:
+            if feature.get("feature_sequence"):
                 expected_length = sum(
                     map(
                         lambda dict: int(dict["feature_range_end"])
@@ -725,8 +1476,78 @@ if __name__ == "__main__":
             del feature["feature_start"]
             del feature["feature_end"]
 
+    plot_types = []
+    if args.gc_content:
+        plot_types.append("gc-content")
+    if args.gc_skew:
+        plot_types.append("gc-skew")
+    if plot_types:
+        add_gc_plots(seq_records, windows, args.step, plot_types)
+
+    # splice the records converted in this run into the records reused from the previous output
+    # records removed above are cached without a span so they are skipped in the next run
+    record_jsons = [None] * len(seq_records)
+    record_hashes = []
+    if seq_record_entries:
+        converted = {id(seq_record) for seq_record in seq_records}
+        seq_records = []
+        record_jsons = []
+        for record_hash, seq_record, record_json, is_parsed in seq_record_entries:
+            if is_parsed and id(seq_record) not in converted:
+                seq_record = None
+            if seq_record is None and record_json is None:
+                record_hashes.append((record_hash, False))
+                continue
+            record_hashes.append((record_hash, True))
+            seq_records.append(seq_record)
+            record_jsons.append(record_json)
+
+        # if nothing was parsed and the records are in the same order, the previous output
+        # and cache are already up to date
+        if (
+            cache
+            and not any(entry[3] for entry in seq_record_entries)
+            and [
+                (entry["hash"], entry["span"] is not None) for entry in cache["records"]
+            ]
+            == record_hashes
+        ):
+            sys.exit(0)
+
+    # in compact mode feature sequences are written as references to the record sequence
+    # record indexes are assigned here, after empty records have been removed
+    if args.compact:
+        if args.sequence:
+            add_feature_sequence_refs(seq_records)
+        compact_seq_records = get_compact_seq_records(seq_records)
+        output, record_spans, strings_span = get_output_json(
+            [
+                get_seq_record_json(record, True)
+                for record in compact_seq_records["records"]
+            ],
+            compact_seq_records["strings"],
+        )
+    else:
+        output, record_spans, strings_span = get_output_json(
+            [
+                record_json or get_seq_record_json(seq_record, False)
+                for seq_record, record_json in zip(seq_records, record_jsons)
+            ]
+        )
+
     if args.output:
         with open(args.output, "w") as f:
-            json.dump(seq_records, f, indent=4)
+            f.write(output)
     else:
-        print(json.dumps(seq_records, indent=4))
+        print(output)
+
+    if seq_record_entries:
+        record_spans = iter(record_spans)
+        write_incremental_cache(
+            cache_path,
+            cache_options,
+            output,
+            [record_hash for record_hash, _ in record_hashes],
+            [next(record_spans) if kept else None for _, kept in record_hashes],
+            strings_span,
+        )
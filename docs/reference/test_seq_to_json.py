@@ -0,0 +1,199 @@
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from seq_to_json import (
+    add_feature_sequence_refs,
+    add_feature_sequences,
+    expand_compact_seq_records,
+    get_compact_seq_records,
+    get_gc_plots,
+    get_orf_features,
+    get_orf_ranges,
+    get_seq_records,
+    get_start_and_stop_codons,
+)
+
+SCRIPT = Path(__file__).parent / "seq_to_json.py"
+SEQUENCE_FILES = Path(__file__).parent / ".." / "inputs" / "sequence_files"
+
+
+def run_seq_to_json(*args):
+    subprocess.run([sys.executable, str(SCRIPT), *map(str, args)], check=True)
+
+
+GENBANK_RECORDS = """LOCUS       FIRST 24 bp    DNA
+FEATURES             Location/Qualifiers
+     CDS             2..10
+                     /product="hypothetical protein"
+     CDS             complement(3..8)
+                     /product="hypothetical protein"
+     CDS             join(1..3,7..9,20..24)
+                     /gene="abc"
+     CDS             complement(join(1..2,10..12))
+                     /pseudo
+ORIGIN
+        1 atgcatgcaa ccggttgact ttag
+//
+LOCUS       SECOND 12 bp    DNA
+FEATURES             Location/Qualifiers
+     gene            complement(4..12)
+                     /product="hypothetical protein"
+ORIGIN
+        1 ggcatgaaat tt
+//
+"""
+
+
+def test_compact_seq_records_expand_to_feature_sequences():
+    seq_records = get_seq_records(GENBANK_RECORDS)
+    add_feature_sequences(seq_records)
+    expected = json.loads(json.dumps(seq_records))
+
+    seq_records = get_seq_records(GENBANK_RECORDS)
+    add_feature_sequence_refs(seq_records)
+    compact_seq_records = json.loads(json.dumps(get_compact_seq_records(seq_records)))
+    assert compact_seq_records["strings"].count("hypothetical protein") == 1
+    assert compact_seq_records["records"][0]["features"][2][
+        "feature_sequence_refs"
+    ] == [[0, 1, 3, 1], [0, 7, 9, 1], [0, 20, 24, 1]]
+    assert expand_compact_seq_records(compact_seq_records) == expected
+    assert expected[0]["features"][3]["feature_sequence"] == "ggtat"
+    assert expected[1]["features"][0]["feature_sequence"] == "aaatttcat"
+
+
+# count G and C in a window one base at a time, wrapping around the end of the sequence
+def brute_force_gc_counts(sequence, offset, window):
+    wrapped = (sequence + sequence).upper()[offset : offset + window]
+    return wrapped.count("G"), wrapped.count("C")
+
+
+def test_gc_plots_match_brute_force_for_odd_and_even_windows():
+    random.seed(1)
+    sequence = "".join(random.choice("ACGTacgtn") for _ in range(5003))
+    length = len(sequence)
+    step = 13
+    windows = [1, 7, 1001, 2048, 2049]
+    plots = get_gc_plots(sequence, windows, step, ["gc-content", "gc-skew"])
+    assert len(plots) == 2 * len(windows)
+    for plot in plots:
+        window = plot["window"]
+        for i, score in enumerate(plot["scores"]):
+            position = i * step
+            g, c = brute_force_gc_counts(
+                sequence, (position - window // 2) % length, window
+            )
+            if plot["source"] == "gc-content":
+                expected = round((g + c) / window, 4)
+            else:
+                expected = round((g - c) / (g + c), 4) if g + c else 0
+            assert score == expected
+
+
+# multi-record GenBank input ending with a record that is removed from the output
+def write_multi_record_input(path):
+    text = (SEQUENCE_FILES / "contig_name_changes.gbk").read_text()
+    path.write_text(text + "LOCUS       EMPTY 0 bp    DNA\n//\n")
+
+
+# add a qualifier to the first feature of the second record
+def edit_second_record(path):
+    text = path.read_text()
+    i = text.index("/locus_tag=", text.index("\n//") + 3)
+    path.write_text(text[:i] + '/note="edited"\n                     ' + text[i:])
+
+
+def assert_same_as_full_conversion(tmp_path, input_path, output_path, options):
+    full_path = tmp_path / "full.json"
+    run_seq_to_json(input_path, *options, "-o", full_path)
+    assert output_path.read_bytes() == full_path.read_bytes()
+
+
+@pytest.mark.parametrize("options", [[], ["-s"], ["-s", "-c", "--gc-skew"]])
+def test_incremental_conversion_matches_full_conversion(tmp_path, options):
+    input_path = tmp_path / "input.gbk"
+    output_path = tmp_path / "output.json"
+    cache_path = tmp_path / "output.json.cache"
+    write_multi_record_input(input_path)
+
+    # first run without a cache
+    run_seq_to_json(input_path, *options, "-i", "-o", output_path)
+    assert cache_path.exists()
+    assert_same_as_full_conversion(tmp_path, input_path, output_path, options)
+    assert b"EMPTY" not in output_path.read_bytes()
+    assert json.loads(cache_path.read_text())["records"][-1]["span"] is None
+
+    # nothing changed
+    cache_text = cache_path.read_text()
+    run_seq_to_json(input_path, *options, "-i", "-o", output_path)
+    assert cache_path.read_text() == cache_text
+    assert_same_as_full_conversion(tmp_path, input_path, output_path, options)
+
+    # one record changed, the removed record stays removed
+    edit_second_record(input_path)
+    run_seq_to_json(input_path, *options, "-i", "-o", output_path)
+    assert_same_as_full_conversion(tmp_path, input_path, output_path, options)
+    assert b"edited" in output_path.read_bytes()
+    assert b"EMPTY" not in output_path.read_bytes()
+
+
+def test_incremental_cache_is_ignored_when_options_change(tmp_path):
+    input_path = tmp_path / "input.gbk"
+    output_path = tmp_path / "output.json"
+    write_multi_record_input(input_path)
+    run_seq_to_json(input_path, "-i", "-o", output_path)
+    run_seq_to_json(input_path, "-s", "-i", "-o", output_path)
+    assert_same_as_full_conversion(tmp_path, input_path, output_path, ["-s"])
+
+
+# get (start, end, strand) for ORF features
+def orf_locations(features):
+    return [
+        (
+            int(feature["feature_locations"][0]["feature_range_start"]),
+            int(feature["feature_locations"][0]["feature_range_end"]),
+            feature["feature_strand"],
+        )
+        for feature in features
+    ]
+
+
+@pytest.mark.parametrize(
+    "sequence, min_length, expected",
+    [
+        # forward strand, starts at the first ATG after a stop
+        ("CCATGATGAAATAGCC", 1, [(3, 14, 1)]),
+        ("CCATGATGAAATAGCC", 4, [(3, 14, 1)]),
+        ("CCATGATGAAATAGCC", 5, []),
+        # the same ORF on the reverse strand
+        ("GGCTATTTCATCATGG", 1, [(3, 14, -1)]),
+        # ORFs on both strands, lower case and unterminated ORFs
+        ("atgtaantcagggcat", 1, [(1, 6, 1), (8, 16, -1)]),
+        ("CCATGAAA", 1, []),
+    ],
+)
+def test_orf_features_on_both_strands(sequence, min_length, expected):
+    start_codons, stop_codons = get_start_and_stop_codons(11)
+    features = get_orf_features(sequence, 11, min_length, start_codons, stop_codons)
+    assert orf_locations(features) == expected
+    for feature in features:
+        assert feature["feature_qualifiers"] == [
+            {"feature_name": "transl_table", "feature_value": "11"}
+        ]
+        if feature["feature_strand"] == -1:
+            assert feature["location_text"].startswith("complement(")
+
+
+def test_orf_ranges_with_alt_starts_and_custom_stop_codons():
+    start_codons, stop_codons = get_start_and_stop_codons(11)
+    assert start_codons == ["ATG"]
+    assert get_orf_ranges("GTGAAATAG", start_codons, stop_codons, 1) == []
+    alt_start_codons, _ = get_start_and_stop_codons(11, alt_starts=True)
+    assert "GTG" in alt_start_codons
+    assert get_orf_ranges("GTGAAATAG", alt_start_codons, stop_codons, 1) == [(0, 9)]
+    assert get_orf_ranges("ATGCCCAAATAA", start_codons, stop_codons, 1) == [(0, 12)]
+    assert get_orf_ranges("ATGCCCAAATAA", start_codons, ["AAA"], 1) == [(0, 9)]